@@ -1,7 +1,9 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api_routes import thought_stream, mcp_servers, router, file_download
 from app.api_routes import transcription  # Add this import
+import openai
 import os
 import logging
 import subprocess
@@ -55,6 +57,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Translate known OpenAI failures into HTTP responses here, so route
+# handlers don't carry a broad try/except around their happy path. These are
+# expected operational errors - logged without tracebacks.
+@app.exception_handler(openai.BadRequestError)
+async def openai_bad_request_handler(request: Request, exc: openai.BadRequestError):
+    logger.error(f"OpenAI API request error: {exc}")
+    return JSONResponse(status_code=400, content={"detail": f"Audio processing failed: {str(exc)}"})
+
+@app.exception_handler(openai.AuthenticationError)
+async def openai_authentication_handler(request: Request, exc: openai.AuthenticationError):
+    logger.error("OpenAI authentication failed - invalid API key")
+    return JSONResponse(status_code=401, content={"detail": "Invalid OpenAI API key. Please check your configuration."})
+
+@app.exception_handler(openai.RateLimitError)
+async def openai_rate_limit_handler(request: Request, exc: openai.RateLimitError):
+    logger.error("OpenAI rate limit exceeded")
+    return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded. Please try again later."})
+
+@app.exception_handler(openai.APIConnectionError)
+async def openai_connection_handler(request: Request, exc: openai.APIConnectionError):
+    logger.error("Failed to connect to OpenAI API")
+    return JSONResponse(status_code=503, content={"detail": "Unable to connect to OpenAI API. Please try again."})
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
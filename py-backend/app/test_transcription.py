@@ -1,10 +1,10 @@
 # test_transcription.py - Run this to test your backend setup
-import requests
+import asyncio
+import httpx
+import numpy as np
 import os
 import io
 import wave
-import struct
-import math
 
 def create_test_audio():
     """Create a simple test audio file (sine wave) for testing"""
@@ -12,194 +12,191 @@ def create_test_audio():
     sample_rate = 16000
     duration = 2.0  # 2 seconds
     frequency = 440  # A note
-    
-    # Generate sine wave
-    samples = int(sample_rate * duration)
-    audio_data = []
-    
-    for i in range(samples):
-        t = i / sample_rate
-        sample = int(32767 * 0.5 * math.sin(2 * math.pi * frequency * t))
-        audio_data.append(sample)
-    
+
+    # Generate sine wave (vectorized - one C-level pass over the buffer)
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    audio_data = (32767 * 0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
     # Create WAV file in memory
     wav_buffer = io.BytesIO()
     with wave.open(wav_buffer, 'wb') as wav_file:
         wav_file.setnchannels(1)  # Mono
         wav_file.setsampwidth(2)  # 2 bytes per sample
         wav_file.setframerate(sample_rate)
-        
-        # Pack audio data
-        packed_data = struct.pack('<' + 'h' * len(audio_data), *audio_data)
-        wav_file.writeframes(packed_data)
-    
+        wav_file.writeframes(audio_data.tobytes())
+
     wav_buffer.seek(0)
     return wav_buffer.getvalue()
 
-def test_backend():
+async def test_backend():
     base_url = "http://localhost:8000"
-    
+
     print("🧪 Testing FinAgent Backend with Transcription Support")
     print("=" * 60)
-    
-    # Test 1: Main health check
-    print("\n1️⃣ Testing main health check...")
-    try:
-        response = requests.get(f"{base_url}/health")
-        print(f"   Status: {response.status_code}")
-        print(f"   Response: {response.json()}")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        print("   Make sure your FastAPI server is running: python app.py")
-        return
-    
-    # Test 2: Root endpoint
-    print("\n2️⃣ Testing root endpoint...")
-    try:
-        response = requests.get(f"{base_url}/")
-        print(f"   Status: {response.status_code}")
-        data = response.json()
-        print(f"   Available endpoints: {list(data.get('endpoints', {}).keys())}")
-        if 'transcription' in data.get('endpoints', {}):
-            print("   ✅ Transcription endpoint found in root response")
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, follow_redirects=True) as client:
+        # Tests 1-4 and 6 are independent GETs - fire them concurrently so the
+        # script pays roughly one round-trip instead of five
+        health_resp, root_resp, trans_health_resp, info_resp, docs_resp = await asyncio.gather(
+            client.get("/health"),
+            client.get("/"),
+            client.get("/api/transcribe/health"),
+            client.get("/api/transcribe/info"),
+            client.get("/docs"),
+            return_exceptions=True,
+        )
+
+        # Test 1: Main health check
+        print("\n1️⃣ Testing main health check...")
+        if isinstance(health_resp, Exception):
+            print(f"   ❌ Error: {health_resp}")
+            print("   Make sure your FastAPI server is running: python app.py")
+            return
+        print(f"   Status: {health_resp.status_code}")
+        print(f"   Response: {health_resp.json()}")
+
+        # Test 2: Root endpoint
+        print("\n2️⃣ Testing root endpoint...")
+        if isinstance(root_resp, Exception):
+            print(f"   ❌ Error: {root_resp}")
         else:
-            print("   ⚠️ Transcription endpoint not listed in root response")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-    
-    # Test 3: Transcription health check
-    print("\n3️⃣ Testing transcription health check...")
-    try:
-        response = requests.get(f"{base_url}/api/transcribe/health")
-        print(f"   Status: {response.status_code}")
-        data = response.json()
-        print(f"   Response: {data}")
-        
-        if response.status_code == 200 and data.get('status') == 'healthy':
-            print("   ✅ Transcription service is healthy")
-        elif data.get('error'):
-            print(f"   ❌ Transcription service error: {data.get('error')}")
+            print(f"   Status: {root_resp.status_code}")
+            data = root_resp.json()
+            print(f"   Available endpoints: {list(data.get('endpoints', {}).keys())}")
+            if 'transcription' in data.get('endpoints', {}):
+                print("   ✅ Transcription endpoint found in root response")
+            else:
+                print("   ⚠️ Transcription endpoint not listed in root response")
+
+        # Test 3: Transcription health check
+        print("\n3️⃣ Testing transcription health check...")
+        if isinstance(trans_health_resp, Exception):
+            print(f"   ❌ Error: {trans_health_resp}")
+            if "404" in str(trans_health_resp):
+                print("   💡 This suggests the transcription router is not properly included")
         else:
-            print("   ⚠️ Transcription service status unclear")
-            
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        if "404" in str(e):
-            print("   💡 This suggests the transcription router is not properly included")
-    
-    # Test 4: Transcription info
-    print("\n4️⃣ Testing transcription info endpoint...")
-    try:
-        response = requests.get(f"{base_url}/api/transcribe/info")
-        print(f"   Status: {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
+            print(f"   Status: {trans_health_resp.status_code}")
+            data = trans_health_resp.json()
+            print(f"   Response: {data}")
+
+            if trans_health_resp.status_code == 200 and data.get('status') == 'healthy':
+                print("   ✅ Transcription service is healthy")
+            elif data.get('error'):
+                print(f"   ❌ Transcription service error: {data.get('error')}")
+            else:
+                print("   ⚠️ Transcription service status unclear")
+
+        # Test 4: Transcription info
+        print("\n4️⃣ Testing transcription info endpoint...")
+        if isinstance(info_resp, Exception):
+            print(f"   ❌ Error: {info_resp}")
+        elif info_resp.status_code == 200:
+            data = info_resp.json()
+            print(f"   Status: {info_resp.status_code}")
             print(f"   Provider: {data.get('provider')}")
             print(f"   Supported formats: {data.get('supported_formats')}")
             print("   ✅ Transcription info endpoint working")
         else:
+            print(f"   Status: {info_resp.status_code}")
             print("   ❌ Transcription info endpoint not working")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-    
-    # Test 5: OpenAI API Key check
-    print("\n5️⃣ Checking OpenAI API Key...")
-    openai_key = os.getenv('OPENAI_API_KEY')
-    if openai_key:
-        if openai_key.startswith('sk-'):
-            print("   ✅ OpenAI API Key found and looks valid")
+
+        # Test 5: OpenAI API Key check
+        print("\n5️⃣ Checking OpenAI API Key...")
+        openai_key = os.getenv('OPENAI_API_KEY')
+        if openai_key:
+            if openai_key.startswith('sk-'):
+                print("   ✅ OpenAI API Key found and looks valid")
+            else:
+                print("   ⚠️ OpenAI API Key found but doesn't start with 'sk-'")
         else:
-            print("   ⚠️ OpenAI API Key found but doesn't start with 'sk-'")
-    else:
-        print("   ❌ OpenAI API Key not found in environment")
-        print("   💡 Set it with: export OPENAI_API_KEY='your-key-here'")
-    
-    # Test 6: Check FastAPI docs
-    print("\n6️⃣ Testing FastAPI documentation...")
-    try:
-        response = requests.get(f"{base_url}/docs")
-        if response.status_code == 200:
+            print("   ❌ OpenAI API Key not found in environment")
+            print("   💡 Set it with: export OPENAI_API_KEY='your-key-here'")
+
+        # Test 6: Check FastAPI docs
+        print("\n6️⃣ Testing FastAPI documentation...")
+        if isinstance(docs_resp, Exception):
+            print(f"   ❌ Error: {docs_resp}")
+        elif docs_resp.status_code == 200:
             print("   ✅ FastAPI docs available at http://localhost:8000/docs")
             print("   💡 Check the docs to see if 'Voice Transcription' section exists")
         else:
             print("   ❌ FastAPI docs not accessible")
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-
-    # Test 7: POST test for actual transcription
-    print("\n7️⃣ Testing actual transcription POST endpoint...")
-    if not openai_key or not openai_key.startswith('sk-'):
-        print("   ⏭️ Skipping transcription POST test - no valid OpenAI API key")
-    else:
+
+        # Test 7: POST test for actual transcription (depends on test audio, run sequentially)
+        print("\n7️⃣ Testing actual transcription POST endpoint...")
+        if not openai_key or not openai_key.startswith('sk-'):
+            print("   ⏭️ Skipping transcription POST test - no valid OpenAI API key")
+        else:
+            try:
+                print("   📝 Creating test audio file...")
+                test_audio = create_test_audio()
+
+                # Prepare the file for upload - hand httpx a file-like so the
+                # multipart body is streamed in chunks rather than materialized
+                files = {
+                    'file': ('test_audio.wav', io.BytesIO(test_audio), 'audio/wav')
+                }
+
+                print("   🚀 Sending transcription request...")
+                response = await client.post("/api/transcribe", files=files)
+
+                print(f"   Status: {response.status_code}")
+
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                        print(f"   ✅ Transcription successful!")
+                        print(f"   Text: '{data.get('text', 'No text returned')}'")
+                        print(f"   Duration: {data.get('duration', 'Unknown')}s")
+                        if data.get('confidence'):
+                            print(f"   Confidence: {data.get('confidence')}")
+                    except ValueError:
+                        print("   ⚠️ Response is not JSON format")
+                        print(f"   Raw response: {response.text[:200]}...")
+                elif response.status_code == 422:
+                    print("   ❌ Validation error - check file format")
+                    try:
+                        error_detail = response.json()
+                        print(f"   Detail: {error_detail}")
+                    except:
+                        print(f"   Raw error: {response.text}")
+                elif response.status_code == 500:
+                    print("   ❌ Server error - likely OpenAI API issue")
+                    try:
+                        error_detail = response.json()
+                        print(f"   Error: {error_detail.get('detail', 'Unknown server error')}")
+                    except:
+                        print(f"   Raw error: {response.text}")
+                else:
+                    print(f"   ❌ Unexpected status code: {response.status_code}")
+                    print(f"   Response: {response.text}")
+
+            except Exception as e:
+                print(f"   ❌ Error during POST test: {e}")
+
+        # Test 8: Test with invalid file (to check error handling)
+        print("\n8️⃣ Testing error handling with invalid file...")
         try:
-            print("   📝 Creating test audio file...")
-            test_audio = create_test_audio()
-            
-            # Prepare the file for upload
+            # Send a text file instead of audio
             files = {
-                'file': ('test_audio.wav', test_audio, 'audio/wav')
+                'file': ('test.txt', b'This is not an audio file', 'text/plain')
             }
-            
-            print("   🚀 Sending transcription request...")
-            response = requests.post(f"{base_url}/api/transcribe", files=files)
-            
+
+            response = await client.post("/api/transcribe", files=files)
             print(f"   Status: {response.status_code}")
-            
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    print(f"   ✅ Transcription successful!")
-                    print(f"   Text: '{data.get('text', 'No text returned')}'")
-                    print(f"   Duration: {data.get('duration', 'Unknown')}s")
-                    if data.get('confidence'):
-                        print(f"   Confidence: {data.get('confidence')}")
-                except ValueError:
-                    print("   ⚠️ Response is not JSON format")
-                    print(f"   Raw response: {response.text[:200]}...")
-            elif response.status_code == 422:
-                print("   ❌ Validation error - check file format")
-                try:
-                    error_detail = response.json()
-                    print(f"   Detail: {error_detail}")
-                except:
-                    print(f"   Raw error: {response.text}")
-            elif response.status_code == 500:
-                print("   ❌ Server error - likely OpenAI API issue")
+
+            if response.status_code == 400 or response.status_code == 422:
+                print("   ✅ Server correctly rejected invalid file format")
                 try:
-                    error_detail = response.json()
-                    print(f"   Error: {error_detail.get('detail', 'Unknown server error')}")
+                    error_data = response.json()
+                    print(f"   Error message: {error_data.get('detail', 'No detail')}")
                 except:
-                    print(f"   Raw error: {response.text}")
+                    print(f"   Raw response: {response.text}")
             else:
-                print(f"   ❌ Unexpected status code: {response.status_code}")
-                print(f"   Response: {response.text}")
-                
+                print(f"   ⚠️ Unexpected response to invalid file: {response.status_code}")
+
         except Exception as e:
-            print(f"   ❌ Error during POST test: {e}")
-    
-    # Test 8: Test with invalid file (to check error handling)
-    print("\n8️⃣ Testing error handling with invalid file...")
-    try:
-        # Send a text file instead of audio
-        files = {
-            'file': ('test.txt', b'This is not an audio file', 'text/plain')
-        }
-        
-        response = requests.post(f"{base_url}/api/transcribe", files=files)
-        print(f"   Status: {response.status_code}")
-        
-        if response.status_code == 400 or response.status_code == 422:
-            print("   ✅ Server correctly rejected invalid file format")
-            try:
-                error_data = response.json()
-                print(f"   Error message: {error_data.get('detail', 'No detail')}")
-            except:
-                print(f"   Raw response: {response.text}")
-        else:
-            print(f"   ⚠️ Unexpected response to invalid file: {response.status_code}")
-            
-    except Exception as e:
-        print(f"   ❌ Error during invalid file test: {e}")
+            print(f"   ❌ Error during invalid file test: {e}")
 
     print("\n" + "=" * 60)
     print("🏁 Test Complete!")
@@ -216,4 +213,4 @@ def test_backend():
     print("- Try with a real audio file containing speech for better results")
 
 if __name__ == "__main__":
-    test_backend()
+    asyncio.run(test_backend())